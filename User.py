@@ -1,21 +1,61 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from pydantic import BaseModel, EmailStr, validator
-from typing import List, Optional
-from security import hash_password
-from auth import auth_router
-from db import get_db
-from models import User
+from pydantic import BaseModel, EmailStr, root_validator, validator
+from typing import Any, Dict, List, Optional
+from enum import Enum
+from datetime import datetime, timezone
+from security import HashQueueFull, hash_password_async, hash_passwords_async, is_password_hash
+from auth import auth_router, get_current_user, principal_cache
+from db import SEARCH_STATEMENT_TIMEOUT_MS, db_with_statement_timeout, get_db, get_read_db, read_session_factory
+from models import Post, RefreshToken, User
+from export import ExportFormat, stream_export
+from bulk import BulkItemResult, BulkResult, chunks, summarize, validate_items
+from responses import cached_json_response, invalidate_response
+from limits import bulk_signup_concurrency, signup_concurrency, user_update_concurrency
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
+from projection import parse_fields, project_rows, select_columns
+from loaders import fetch_by_ids, get_loader
 
 app = FastAPI(title="User Management API")
 
+# 🗜️ Optional gzip/brotli above a size threshold (RESPONSE_COMPRESSION)
+from responses import add_compression
+add_compression(app)
+
+# 📈 Per-route latency/status metrics and DB query counts, served at /metrics
+# added last so it wraps compression and times the whole response
+from metrics import MetricsMiddleware, query_budget, router as metrics_router
+app.add_middleware(MetricsMiddleware)
+app.include_router(metrics_router)
+
+# ⏳ Password hash pool is saturated: shed the request instead of queueing forever
+@app.exception_handler(HashQueueFull)
+async def hash_queue_full_handler(request: Request, exc: HashQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 # 🔐 Register auth routes
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
 
-from posts import router as posts_router
+from posts import POST_SUMMARY_COLUMNS, PostSummaryPage, newest_first, router as posts_router
 app.include_router(posts_router) #uses prefix "/posts" from the router
 
+# 🩺 Liveness /health and readiness /ready probes
+from health import router as health_router
+app.include_router(health_router)
+
+# 🔧 Connection pool introspection for sizing pools per worker
+from debug import router as debug_router
+app.include_router(debug_router)
+
 # -----------------------
 # Pydantic Schemas
 # -----------------------
@@ -31,6 +71,44 @@ class UserIn(BaseModel):
             raise ValueError("Password must be at least 8 characters")
         return v
 
+class UserPatch(BaseModel):
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @validator('password')
+    def validate_password(cls, v):
+        if v is not None and len(v) < 8:
+            raise ValueError("Password must be at least 8 characters")
+        return v
+
+class BulkUserIn(BaseModel):
+    """A backfill record: a password to hash, or a password_hash exported by the legacy system"""
+    username: str
+    email: EmailStr
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @validator('password')
+    def validate_password(cls, v):
+        if v is not None and len(v) < 8:
+            raise ValueError("Password must be at least 8 characters")
+        return v
+
+    @validator('password_hash')
+    def validate_password_hash(cls, v):
+        if v is not None and not is_password_hash(v):
+            raise ValueError("Not a supported password hash")
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def password_or_hash(cls, values):
+        if (values.get("password") is None) == (values.get("password_hash") is None):
+            raise ValueError("Give exactly one of password and password_hash")
+        return values
+
 class UserOut(BaseModel):
     id: int
     username: str
@@ -40,115 +118,318 @@ class UserOut(BaseModel):
     class Config:
         orm_mode = True  # ✅ allows returning SQLAlchemy models directly
 
+# columns behind UserOut, for list endpoints that skip ORM objects entirely
+USER_OUT_COLUMNS = (User.id, User.username, User.email, User.full_name)
 
-# -----------------------
-# Health Check
-# -----------------------
-@app.get("/health")
-async def health_check(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User))
-    users = result.scalars().all()
-    return {"status": "healthy", "users_count": len(users)}
+# ?fields= vocabulary for the user list/get endpoints
+USER_FIELDS = tuple(column.key for column in USER_OUT_COLUMNS)
+FIELDS_QUERY = Query(None, description="Comma-separated subset of " + ",".join(USER_FIELDS))
+
+class UserFields(BaseModel):
+    id: Optional[int] = None
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = None
+
+class UserPage(BaseModel):
+    items: List[UserFields]
+    next_cursor: Optional[str] = None
+
+class SearchMode(str, Enum):
+    substring = "substring"
+    prefix = "prefix"
+    fuzzy = "fuzzy"
+
+
+UNIQUE_VIOLATION_MESSAGES = {
+    "ix_users_username": "Username already exists",
+    "ix_users_email": "Email already exists",
+}
+
+def raise_for_unique_violation(exc: IntegrityError):
+    """Map a unique index violation on users to the matching 400 response"""
+    message = str(exc.orig)
+    for index_name, detail in UNIQUE_VIOLATION_MESSAGES.items():
+        if f'"{index_name}"' in message:
+            raise HTTPException(status_code=400, detail=detail)
 
 
 # -----------------------
 # Create User
 # -----------------------
-@app.post("/users", response_model=UserOut, status_code=201)
+@app.post("/users", response_model=UserOut, status_code=201, dependencies=[Depends(query_budget(1)), Depends(signup_concurrency)])
 async def create_user(user: UserIn, db: AsyncSession = Depends(get_db)):
-    # check unique username/email
-    result = await db.execute(select(User).where(User.username == user.username))
-    if result.scalars().first():
-        raise HTTPException(status_code=400, detail="Username already exists")
-
-    result = await db.execute(select(User).where(User.email == user.email))
-    if result.scalars().first():
-        raise HTTPException(status_code=400, detail="Email already exists")
-
-    new_user = User(
-        username=user.username,
-        email=user.email,
-        password_hash=hash_password(user.password),
-        full_name=user.full_name,
-    )
+    password_hash = await hash_password_async(user.password)
 
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    # one INSERT ... RETURNING; the unique indexes decide username/email clashes
+    try:
+        result = await db.execute(
+            insert(User)
+            .values(
+                username=user.username,
+                email=user.email,
+                password_hash=password_hash,
+                full_name=user.full_name,
+            )
+            .returning(User)
+        )
+        new_user = result.scalar_one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise_for_unique_violation(e)
+        raise
     return new_user
 
 
+# -----------------------
+# Bulk Create Users
+# -----------------------
+@app.post("/users/bulk", response_model=BulkResult, dependencies=[Depends(bulk_signup_concurrency)])
+async def bulk_create_users(items: List[Dict[str, Any]], db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
+    # backfills at scale should send password_hash: bcrypt costs ~0.25 s per
+    # plain password, so only pre-hashed rows can load 1M users in minutes
+    valid, results = validate_items(BulkUserIn, items)
+
+    # duplicates inside the batch fail here; clashes with existing rows are
+    # skipped by ON CONFLICT DO NOTHING below
+    usernames, emails, pending = set(), set(), []
+    for index, user in valid:
+        if user.username in usernames:
+            results[index] = BulkItemResult(index=index, error="Username already exists")
+        elif user.email in emails:
+            results[index] = BulkItemResult(index=index, error="Email already exists")
+        else:
+            usernames.add(user.username)
+            emails.add(user.email)
+            pending.append((index, user))
+
+    # hashes are only computed for records that came with a plain password
+    computed = iter(await hash_passwords_async(
+        [user.password for _, user in pending if user.password_hash is None]
+    ))
+    hashes = [user.password_hash or next(computed) for _, user in pending]
+
+    for batch in chunks(list(zip(pending, hashes))):
+        rows = [
+            {
+                "username": user.username,
+                "email": user.email,
+                "full_name": user.full_name,
+                "password_hash": password_hash,
+            }
+            for (_, user), password_hash in batch
+        ]
+        result = await db.execute(
+            pg_insert(User).values(rows).on_conflict_do_nothing().returning(User.id, User.username)
+        )
+        inserted = {row.username: row.id for row in result}
+        for (index, user), _ in batch:
+            if user.username in inserted:
+                results[index] = BulkItemResult(index=index, id=inserted[user.username])
+            else:
+                results[index] = BulkItemResult(index=index, error="Username or email already exists")
+
+    await db.commit()
+    return summarize(results, len(items))
+
+
 # -----------------------
 # Get All Users
 # -----------------------
-@app.get("/users", response_model=List[UserOut])
-async def get_users(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User))
-    return result.scalars().all()
+@app.get("/users", response_model=UserPage, response_class=ORJSONResponse, dependencies=[Depends(query_budget(1))])
+async def get_users(
+    ids: Optional[str] = Query(None, description="Comma-separated user ids to fetch in one query (no paging)"),
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    names = parse_fields(fields, USER_FIELDS)
+    columns = select_columns(USER_OUT_COLUMNS, names, required=("id",))
+    if ids:
+        users = await fetch_by_ids(db, columns, User.id, ids)
+        return ORJSONResponse({"items": project_rows(users, names), "next_cursor": None})
+
+    # keyset on id: every page is an index range scan, no OFFSET
+    query = select(*columns).order_by(User.id).limit(limit + 1)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(User.id > last_id)
+
+    # plain rows straight to orjson: no ORM identity map, no pydantic re-validation
+    result = await db.execute(query)
+    users, next_cursor = paginate(result.all(), limit, lambda u: (u.id,))
+    return ORJSONResponse({"items": project_rows(users, names), "next_cursor": next_cursor})
+
+
+# -----------------------
+# Export Users (streamed)
+# -----------------------
+@app.get("/users/export")
+async def export_users(request: Request, format: ExportFormat = ExportFormat.ndjson):
+    query = select(*USER_OUT_COLUMNS).order_by(User.id)
+    return stream_export(await read_session_factory(request), query, format, "users")
 
 
 # -----------------------
 # Search Users
 # -----------------------
-@app.get("/users/search", response_model=List[UserOut])
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+# shorter terms yield no trigrams: substring/fuzzy would scan the whole GIN index
+SEARCH_MIN_TRIGRAM_TERM = 3
+# fuzzy matches ranked per request; the best hits outside this sample can be missed
+SEARCH_FUZZY_CANDIDATES = 1000
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+@app.get("/users/search", response_model=List[UserOut], response_class=ORJSONResponse, dependencies=[Depends(query_budget(2))])
 async def search_users(
     username: Optional[str] = None,
     email: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    mode: SearchMode = SearchMode.substring,
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    db: AsyncSession = Depends(db_with_statement_timeout(SEARCH_STATEMENT_TIMEOUT_MS, read_only=True))
 ):
-    query = select(User)
-    if username:
-        query = query.where(User.username.ilike(f"%{username}%"))
-    if email:
-        query = query.where(User.email.ilike(f"%{email}%"))
+    # every mode is served by the pg_trgm GIN indexes on username/email
+    query = select(*USER_OUT_COLUMNS)
+    fuzzy_terms = []
+    for column, term in ((User.username, username), (User.email, email)):
+        if not term:
+            continue
+        if mode is not SearchMode.prefix and len(term) < SEARCH_MIN_TRIGRAM_TERM:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{mode.value} search needs at least {SEARCH_MIN_TRIGRAM_TERM} characters; use mode=prefix",
+            )
+        if mode is SearchMode.fuzzy:
+            query = query.where(column.op("%")(term))
+            fuzzy_terms.append((column.key, term))
+        else:
+            pattern = _escape_like(term) + "%"
+            if mode is SearchMode.substring:
+                pattern = "%" + pattern
+            query = query.where(column.ilike(pattern, escape="\\"))
 
-    result = await db.execute(query)
-    return result.scalars().all()
+    if fuzzy_terms:
+        # GIN finds trigram matches but can't return them by similarity: rank a
+        # capped candidate set so a broad term never scores the whole table
+        candidates = query.limit(SEARCH_FUZZY_CANDIDATES).subquery()
+        rank = None
+        for key, term in fuzzy_terms:
+            similarity = func.similarity(candidates.c[key], term)
+            rank = similarity if rank is None else rank + similarity
+        query = select(candidates).order_by(rank.desc(), candidates.c.id)
+    else:
+        # id order lets the scan stop after LIMIT matches instead of scoring them all
+        query = query.order_by(User.id)
+
+    result = await db.execute(query.limit(limit))
+    return ORJSONResponse([row._asdict() for row in result.all()])
 
 
 # -----------------------
 # Get Specific User
 # -----------------------
-@app.get("/users/{user_id}", response_model=UserOut)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+@app.get("/users/{user_id}", response_model=UserOut, dependencies=[Depends(query_budget(1))])
+async def get_user(user_id: int, request: Request, fields: Optional[str] = FIELDS_QUERY, db: AsyncSession = Depends(get_db)):
+    names = parse_fields(fields, USER_FIELDS)
+
+    async def render():
+        # through the request's loader, so other lookups of this user share the query
+        user = await get_loader(db, User).load(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return UserOut.from_orm(user).json().encode()
+
+    return await cached_json_response(request, f"user:{user_id}", render, names if fields else None)
 
 
 # -----------------------
-# Update User
+# User Timeline
 # -----------------------
-@app.put("/users/{user_id}", response_model=UserOut)
-async def update_user(user_id: int, user_updates: UserIn, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+@app.get("/users/{user_id}/posts", response_model=PostSummaryPage, response_class=ORJSONResponse, dependencies=[Depends(query_budget(1))])
+async def user_timeline(
+    user_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # index-only ordered scan of (user_id, created_at DESC, id DESC) INCLUDE (title)
+    query = newest_first(select(*POST_SUMMARY_COLUMNS).where(Post.user_id == user_id), limit, cursor)
+    result = await db.execute(query)
+    posts, next_cursor = paginate(result.all(), limit, lambda p: (p.created_at, p.id))
+    return ORJSONResponse({"items": [row._asdict() for row in posts], "next_cursor": next_cursor})
+
+
+# -----------------------
+# Update User (PUT full / PATCH partial)
+# -----------------------
+NON_NULLABLE_USER_FIELDS = ("username", "email", "password")
+
+async def _update_user(user_id: int, changes: dict, db: AsyncSession):
+    # single UPDATE ... RETURNING; bcrypt only runs when a password was sent
+    for field in NON_NULLABLE_USER_FIELDS:
+        if field in changes and changes[field] is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+    if "password" in changes:
+        changes["password_hash"] = await hash_password_async(changes.pop("password"))
+
+    if not changes:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+    else:
+        try:
+            result = await db.execute(
+                update(User).where(User.id == user_id).values(**changes).returning(User)
+            )
+            user = result.scalars().first()
+            if user and "password_hash" in changes:
+                # same transaction: a leaked refresh token must not outlive a password reset
+                await db.execute(
+                    update(RefreshToken)
+                    .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+                    .values(revoked_at=datetime.now(timezone.utc))
+                )
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise_for_unique_violation(e)
+            raise
+
     if not user:
         raise HTTPException(status_code=404, detail="User does not exist")
+    principal_cache.invalidate(user_id)
+    await invalidate_response(f"user:{user_id}")
+    return user
 
-    user.username = user_updates.username
-    user.email = user_updates.email
-    user.full_name = user_updates.full_name
-    user.password_hash = hash_password(user_updates.password)
+@app.put("/users/{user_id}", response_model=UserOut, dependencies=[Depends(query_budget(2)), Depends(user_update_concurrency)])
+async def update_user(user_id: int, user_updates: UserIn, db: AsyncSession = Depends(get_db)):
+    return await _update_user(user_id, user_updates.dict(), db)
 
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    return user
+@app.patch("/users/{user_id}", response_model=UserOut, dependencies=[Depends(query_budget(2)), Depends(user_update_concurrency)])
+async def patch_user(user_id: int, user_updates: UserPatch, db: AsyncSession = Depends(get_db)):
+    return await _update_user(user_id, user_updates.dict(exclude_unset=True), db)
 
 
 # -----------------------
 # Delete User
 # -----------------------
-@app.delete("/users/{user_id}")
+@app.delete("/users/{user_id}", dependencies=[Depends(query_budget(2))])
 async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
-    if not user:
+    # delete the posts ourselves (same transaction) to learn which cache entries to drop
+    result = await db.execute(delete(Post).where(Post.user_id == user_id).returning(Post.id))
+    post_ids = result.scalars().all()
+    result = await db.execute(delete(User).where(User.id == user_id).returning(User.username))
+    username = result.scalar()
+    if username is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    await db.delete(user)
     await db.commit()
-    return {"message": f"User {user.username} deleted successfully"}
+    principal_cache.invalidate(user_id)
+    await invalidate_response(f"user:{user_id}")
+    for post_id in post_ids:
+        await invalidate_response(f"post:{post_id}")
+    return {"message": f"User {username} deleted successfully"}
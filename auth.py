@@ -1,46 +1,206 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from pydantic import BaseModel
-from security import verify_password, create_access_token, verify_token
-from db import get_db
-from models import User
-from datetime import timedelta
+from security import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, create_access_token,
+    generate_refresh_token, hash_refresh_token, verify_and_update_password_async, verify_token,
+)
+from db import SessionLocal, get_db
+from models import RefreshToken, User
+from cache import TTLCache
+from loaders import get_loader
+from metrics import query_budget, track_cache
+from limits import enforce_login_rate_limit, login_concurrency
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import logging
+import os
+import uuid
 
 auth_router = APIRouter()
 security = HTTPBearer()
+logger = logging.getLogger(__name__)
+
+# 🧠 Authenticated principals keyed by user id; the TTL bounds how long another
+# worker can keep serving a user that was updated or deleted elsewhere
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+track_cache("principal", principal_cache)
+
+# 🧹 Every login/rotation adds a refresh_tokens row; expired ones are purged in the background
+REFRESH_TOKEN_PURGE_INTERVAL_SECONDS = float(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL_SECONDS", "3600"))
+REFRESH_TOKEN_PURGE_BATCH = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH", "5000"))
+_purger = {"task": None}
 
 class LoginRequest(BaseModel):
     username: str
     password: str
 
+class CurrentUser(BaseModel):
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str
     expires_in: int
+    refresh_token: str
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
-@auth_router.post("/login", response_model=TokenResponse)
+async def _issue_tokens(db: AsyncSession, user_id: int, family_id: Optional[str] = None):
+    # new access token plus a refresh token row; the caller commits
+    access_token = create_access_token(
+        data={"sub": str(user_id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = generate_refresh_token()
+    await db.execute(
+        insert(RefreshToken).values(
+            user_id=user_id,
+            token_hash=hash_refresh_token(refresh_token),
+            family_id=family_id or uuid.uuid4().hex,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+# 🚦 Cap bcrypt work per client IP and per username before touching the DB
+async def login_rate_limit(request: Request, credentials: LoginRequest):
+    client_ip = request.client.host if request.client else "unknown"
+    enforce_login_rate_limit(client_ip, credentials.username)
+
+@auth_router.post(
+    "/login",
+    response_model=TokenResponse,
+    dependencies=[Depends(query_budget(3)), Depends(login_rate_limit), Depends(login_concurrency)],
+)
 async def login(credentials: LoginRequest, db: AsyncSession = Depends(get_db)):
     # 🔍 Look up user in DB
     result = await db.execute(select(User).where(User.username == credentials.username))
     user = result.scalars().first()
 
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    verified, new_hash = await verify_and_update_password_async(credentials.password, user.password_hash)
+    if not verified:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    # ✅ Create JWT
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
+    if new_hash:
+        # stored hash uses an old scheme or cost: upgrade it while we have the password
+        await db.execute(update(User).where(User.id == user.id).values(password_hash=new_hash))
+
+    # ✅ Create JWT + refresh token (new family per login)
+    tokens = await _issue_tokens(db, user.id)
+    await db.commit()
+    return tokens
+
+# ♻️ Rotate a refresh token into a new token pair, no password or bcrypt needed
+@auth_router.post("/refresh", response_model=TokenResponse, dependencies=[Depends(query_budget(3))])
+async def refresh(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    token_hash = hash_refresh_token(body.refresh_token)
+    now = datetime.now(timezone.utc)
+
+    # claim the token atomically: only one concurrent caller can rotate it
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id, RefreshToken.family_id)
     )
+    claimed = result.first()
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": 1800
-    }
+    if claimed is None:
+        result = await db.execute(
+            select(RefreshToken.family_id, RefreshToken.revoked_at).where(RefreshToken.token_hash == token_hash)
+        )
+        stale = result.first()
+        if stale is not None and stale.revoked_at is not None:
+            # an already-rotated token came back: assume it leaked, kill the whole family
+            logger.warning("refresh token reuse detected, revoking family %s", stale.family_id)
+            await _revoke_family(db, stale.family_id, now)
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    tokens = await _issue_tokens(db, claimed.user_id, claimed.family_id)
+    await db.commit()
+    return tokens
+
+async def _revoke_family(db: AsyncSession, family_id: str, now: datetime):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    await db.commit()
+
+async def purge_expired_refresh_tokens() -> int:
+    """Delete expired refresh tokens in short batches; returns the number removed"""
+    # reuse detection only needs a revoked row until it expires: an expired
+    # token is rejected on its own, whichever family it belongs to
+    expired = (
+        select(RefreshToken.id)
+        .where(RefreshToken.expires_at < datetime.now(timezone.utc))
+        .limit(REFRESH_TOKEN_PURGE_BATCH)
+    )
+    removed = 0
+    async with SessionLocal() as session:
+        while True:
+            result = await session.execute(delete(RefreshToken).where(RefreshToken.id.in_(expired)))
+            await session.commit()
+            removed += result.rowcount
+            if result.rowcount < REFRESH_TOKEN_PURGE_BATCH:
+                return removed
+
+async def _purge_forever():
+    while True:
+        try:
+            removed = await purge_expired_refresh_tokens()
+            if removed:
+                logger.info("purged %d expired refresh tokens", removed)
+        except Exception:
+            logger.warning("refresh token purge failed", exc_info=True)
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_INTERVAL_SECONDS)
+
+@auth_router.on_event("startup")
+async def start_refresh_token_purger():
+    _purger["task"] = asyncio.create_task(_purge_forever())
+
+@auth_router.on_event("shutdown")
+async def stop_refresh_token_purger():
+    if _purger["task"]:
+        _purger["task"].cancel()
+
+@auth_router.post("/logout", dependencies=[Depends(query_budget(2))])
+async def logout(body: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+    )
+    family_id = result.scalar()
+    if family_id is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    await _revoke_family(db, family_id, datetime.now(timezone.utc))
+    return {"message": "Logged out"}
 
 # 🔑 Extract user from token
 async def get_current_user(
@@ -51,17 +211,24 @@ async def get_current_user(
     payload = verify_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    result = await db.execute(select(User).where(User.id == payload["sub"]))
-    user = result.scalars().first()
+
+    user_id = payload["sub"]
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    # shared per-request loader: a later lookup of the same user in this request is free
+    user = await get_loader(db, User).load(user_id)
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    
-    return user
 
-@auth_router.get("/me")
-async def get_current_user_profile(current_user: User = Depends(get_current_user)):
+    principal = CurrentUser.from_orm(user)
+    principal_cache.set(user_id, principal)
+    return principal
+
+@auth_router.get("/me", dependencies=[Depends(query_budget(1))])
+async def get_current_user_profile(current_user: CurrentUser = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "username": current_user.username,
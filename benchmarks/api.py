@@ -0,0 +1,215 @@
+"""End-to-end API benchmark against a seeded local database
+
+Drives the real `app` from User.py in-process through httpx's ASGI transport,
+so numbers include routing, dependencies, serialization and the DB, but no
+network or server process.
+
+Point DATABASE_URL at a scratch database that has been migrated
+(`alembic upgrade head`), then run from the repo root:
+
+    python -m benchmarks.api --rows 10000 --seed
+    python -m benchmarks.api --rows 100000 --seed --compare benchmarks/baselines/<old>.json
+
+--seed TRUNCATES users and posts. Results are written as JSON under
+benchmarks/baselines/ so runs can be diffed between commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# the login scenario hammers one account from one address; lift the
+# per-process login rate limits before the app reads its settings
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "1000000000")
+os.environ.setdefault("LOGIN_RATE_LIMIT_PER_USERNAME", "1000000000")
+
+import httpx
+
+from db import engine
+from security import hash_password
+from User import app
+
+BENCH_USERNAME = "bench_user"
+BENCH_PASSWORD = "bench-password-123"
+POSTS_PER_USER = 10
+COPY_BATCH = 50000
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+# -----------------------
+# Seeding
+# -----------------------
+async def seed(rows: int):
+    """Load `rows` posts spread over rows / POSTS_PER_USER users with COPY"""
+    user_count = max(rows // POSTS_PER_USER, 1)
+    password_hash = hash_password(BENCH_PASSWORD)  # one bcrypt for every seeded user
+    now = datetime.now(timezone.utc)
+
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("TRUNCATE posts, users RESTART IDENTITY CASCADE")
+        raw = (await conn.get_raw_connection()).driver_connection
+
+        users = [(BENCH_USERNAME, "bench@example.com", "Bench User", password_hash)]
+        users += [
+            (f"user{i:07d}", f"user{i:07d}@example.com", f"User {i}", password_hash)
+            for i in range(1, user_count)
+        ]
+        for start in range(0, len(users), COPY_BATCH):
+            await raw.copy_records_to_table(
+                "users", records=users[start:start + COPY_BATCH],
+                columns=["username", "email", "full_name", "password_hash"],
+            )
+
+        for start in range(0, rows, COPY_BATCH):
+            batch = [
+                (f"Post {i} about topic {i % 97}", f"Body of post {i}. " * 20, i % user_count + 1, now)
+                for i in range(start, min(start + COPY_BATCH, rows))
+            ]
+            await raw.copy_records_to_table(
+                "posts", records=batch, columns=["title", "content", "user_id", "created_at"],
+            )
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("ANALYZE users, posts")
+    return user_count
+
+
+# -----------------------
+# Scenarios
+# -----------------------
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int):
+    latencies, errors = [], 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def build_scenarios(token: str, user_count: int, post_count: int):
+    auth = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(1234)
+
+    return {
+        "health": lambda c, i: c.get("/health"),
+        "login": lambda c, i: c.post("/auth/login", json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD}),
+        "auth_me": lambda c, i: c.get("/auth/me", headers=auth),
+        "create_post": lambda c, i: c.post("/posts/", json={"title": f"bench {i}", "content": "bench body"}, headers=auth),
+        "list_posts": lambda c, i: c.get("/posts/", params={"limit": 50}),
+        "get_post": lambda c, i: c.get(f"/posts/{rng.randint(1, post_count)}"),
+        "search_users": lambda c, i: c.get("/users/search", params={"username": f"user{rng.randint(1, user_count):07d}"[:8]}),
+    }
+
+
+async def run(args):
+    user_count = await seed(args.rows) if args.seed else max(args.rows // POSTS_PER_USER, 1)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/auth/login", json={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+        results = {}
+        for name, make_request in build_scenarios(token, user_count, args.rows).items():
+            if args.only and name not in args.only:
+                continue
+            # logins are bcrypt-bound; a full run of them would dominate wall time
+            requests = max(args.requests // 10, 10) if name == "login" else args.requests
+            results[name] = await run_scenario(client, make_request, requests, args.concurrency)
+            print(f"{name:>13}: {results[name]}")
+    await engine.dispose()
+    return results
+
+
+# -----------------------
+# Baselines
+# -----------------------
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\nvs {baseline_path}")
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        deltas = []
+        for metric in ("throughput_rps", "p50_ms", "p99_ms"):
+            change = (now[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+            deltas.append(f"{metric} {before[metric]} -> {now[metric]} ({change:+.1f}%)")
+        print(f"{name:>13}: " + ", ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000, help="posts to seed (10000, 100000, 1000000)")
+    parser.add_argument("--seed", action="store_true", help="truncate and reseed users/posts first")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", help="where to write the JSON result")
+    parser.add_argument("--compare", help="baseline JSON to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            "revision": revision,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(BASELINE_DIR, f"{revision}-{args.rows}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Login storm benchmark: event-loop latency with inline vs pooled bcrypt
+
+Run from the repo root:  python -m benchmarks.hash_offload --logins 50
+
+A probe coroutine stands in for an unrelated cheap endpoint: it wakes up
+every few milliseconds and records how late the event loop let it run.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from security import hash_password, verify_password, verify_password_async
+
+PROBE_INTERVAL = 0.005
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(samples, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+async def inline_login(password, hashed):
+    # what the handlers did before: bcrypt on the event loop thread
+    return verify_password(password, hashed)
+
+
+async def pooled_login(password, hashed):
+    return await verify_password_async(password, hashed)
+
+
+async def run(login, logins, password, hashed):
+    samples, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(samples, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    started = time.perf_counter()
+    await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    return {
+        "logins_per_s": round(logins / elapsed, 1),
+        "probe_p50_ms": round(statistics.median(samples), 2),
+        "probe_p99_ms": round(percentile(samples, 99), 2),
+        "probe_max_ms": round(max(samples), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = hash_password(password)
+    for name, login in (("inline", inline_login), ("pooled", pooled_login)):
+        print(name, asyncio.run(run(login, args.logins, password, hashed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""JWT verification micro-benchmark: full decode vs verification cache hit
+
+Run from the repo root:  python -m benchmarks.jwt_verify
+"""
+import timeit
+from datetime import timedelta
+
+from security import create_access_token, decode_token, verify_token
+
+
+def main():
+    token = create_access_token({"sub": "42"}, expires_delta=timedelta(minutes=30))
+    verify_token(token)  # warm the cache
+    garbage = token[:-4] + "AAAA"
+    verify_token(garbage)
+
+    for name, call in (
+        ("jwt.decode", lambda: decode_token(token)),
+        ("cache hit", lambda: verify_token(token)),
+        ("cached reject", lambda: verify_token(garbage)),
+    ):
+        runs, total = timeit.Timer(call).autorange()
+        print(f"{name:>14}: {total / runs * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""list_posts serialization benchmark: ORM + orm_mode vs Core rows + orjson
+
+Run from the repo root:  python -m benchmarks.serialization --rows 10000
+
+Both paths run their real statement through SQLAlchemy against an in-memory
+SQLite copy of the posts columns, so the numbers include result processing:
+ORM hydration into Post objects on the old side, Row construction plus the
+list_posts `?fields=` projection on the new side. Driver and network time
+are the same for both and are not what is being compared.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from models import Post
+from posts import POST_FIELDS, POST_LIST_DEFAULT_FIELDS, POST_OUT_COLUMNS, PostOut, newest_first
+from projection import project_rows, select_columns
+
+# only the columns list_posts reads; search_vector is deferred and never loaded
+POSTS_DDL = (
+    "CREATE TABLE posts (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, "
+    "user_id INTEGER NOT NULL, created_at DATETIME NOT NULL)"
+)
+
+
+def make_engine(count):
+    engine = create_engine("sqlite://")
+    # SQLite keeps naive timestamps; both paths parse the same strings
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(POSTS_DDL)
+        conn.exec_driver_sql(
+            "INSERT INTO posts (id, title, content, user_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(i, f"post {i}", "lorem ipsum " * 40, i % 100, now.isoformat(sep=" ")) for i in range(1, count + 1)],
+        )
+    return engine
+
+
+def orm_path(engine, limit):
+    # the old handler: select(Post) + response_model=List[PostOut] through jsonable_encoder
+    with Session(engine) as session:
+        posts = session.execute(newest_first(select(Post), limit, None)).scalars().all()
+        items = [PostOut.from_orm(post) for post in posts]
+    return json.dumps(jsonable_encoder({"items": items, "next_cursor": None})).encode()
+
+
+def core_path(engine, limit, names):
+    # the current list_posts body: requested columns, Row -> dict projection, orjson
+    columns = select_columns(POST_OUT_COLUMNS, names, required=("created_at", "id"))
+    with engine.connect() as conn:
+        rows = conn.execute(newest_first(select(*columns), limit, None)).all()
+    return orjson.dumps({"items": project_rows(rows, names), "next_cursor": None})
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = make_engine(args.rows)
+    # newest_first fetches limit + 1 for the look-ahead row
+    limit = args.rows - 1
+    paths = (
+        ("orm+pydantic", lambda: orm_path(engine, limit)),
+        ("core all", lambda: core_path(engine, limit, POST_FIELDS)),
+        ("core default", lambda: core_path(engine, limit, POST_LIST_DEFAULT_FIELDS)),
+    )
+    results = {name: best_of(fn) for name, fn in paths}
+    for name, seconds in results.items():
+        speedup = results["orm+pydantic"] / seconds
+        print(f"{name:>13}: {args.rows / seconds:12,.0f} rows/s ({seconds * 1000:.1f} ms, {speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+# rows per multi-row INSERT statement (keeps bind params well under asyncpg's limit)
+BULK_INSERT_CHUNK = int(os.getenv("BULK_INSERT_CHUNK", "1000"))
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+def validate_items(schema, items: list):
+    """Validate raw records one by one so a bad record fails alone"""
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+    valid, results = [], {}
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, schema.parse_obj(raw)))
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            results[index] = BulkItemResult(index=index, error=message)
+    return valid, results
+
+
+def chunks(items: list, size: int = BULK_INSERT_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def summarize(results: dict, total: int) -> dict:
+    """Order per-item results by input position and count outcomes"""
+    ordered = [results[index] for index in range(total)]
+    created = sum(1 for item in ordered if item.error is None)
+    return {"created": created, "failed": total - created, "results": ordered}
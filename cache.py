@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+
+    def get(self, key, default=None):
+        """Return a live entry (marking it recently used) or default"""
+        entry = self._data.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl: float = None):
+        """Store a value, evicting the least recently used entries over maxsize"""
+        if ttl is None:
+            ttl = self.ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop an entry if present"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CacheBackend(ABC):
+    """Storage interface for the response cache (async so a shared store can plug in)"""
+
+    @abstractmethod
+    async def get(self, key):
+        """The live value for `key`, or None"""
+
+    @abstractmethod
+    async def set(self, key, value, ttl: float = None):
+        """Store a value; `ttl` overrides the backend default"""
+
+    @abstractmethod
+    async def delete(self, key):
+        """Drop `key` if present"""
+
+    def stats(self) -> dict:
+        """hits/misses/size counters for /metrics (empty when the store has none)"""
+        return {}
+
+
+class LocalCacheBackend(CacheBackend):
+    """Per-process backend on top of TTLCache"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.store = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ttl: float = None):
+        self.store.set(key, value, ttl=ttl)
+
+    async def delete(self, key):
+        self.store.invalidate(key)
+
+    def stats(self) -> dict:
+        return self.store.stats()
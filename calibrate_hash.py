@@ -0,0 +1,79 @@
+"""Pick the password hash cost that fits a latency budget on this machine
+
+    python calibrate_hash.py --scheme bcrypt --target-ms 250
+    python calibrate_hash.py --scheme argon2 --target-ms 250 --memory-cost 65536
+
+Prints the environment settings to deploy. Hashes already stored with other
+parameters are rehashed transparently on each user's next login.
+"""
+import argparse
+import statistics
+import time
+
+from security import ARGON2_MEMORY_COST, ARGON2_PARALLELISM, build_password_context
+
+SAMPLE_PASSWORD = "calibration-password-123"
+
+
+def time_hash(context, samples: int) -> float:
+    """Median milliseconds per hash for a context"""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash(SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(make_context, costs, target_ms: float, samples: int):
+    """Highest cost whose median hash time stays within target_ms"""
+    chosen = None
+    for cost in costs:
+        elapsed = time_hash(make_context(cost), samples)
+        print(f"  cost {cost:>3}: {elapsed:8.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = (cost, elapsed)
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--memory-cost", type=int, default=ARGON2_MEMORY_COST, help="argon2 memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=ARGON2_PARALLELISM, help="argon2 lanes")
+    args = parser.parse_args()
+
+    print(f"calibrating {args.scheme} for <= {args.target_ms:.0f} ms per hash")
+    if args.scheme == "bcrypt":
+        chosen = calibrate(
+            lambda rounds: build_password_context(["bcrypt"], bcrypt_rounds=rounds),
+            range(4, 32), args.target_ms, args.samples,
+        )
+        settings = {"PASSWORD_SCHEMES": "bcrypt", "BCRYPT_ROUNDS": chosen and chosen[0]}
+    else:
+        chosen = calibrate(
+            lambda time_cost: build_password_context(
+                ["argon2"], argon2_time_cost=time_cost,
+                argon2_memory_cost=args.memory_cost, argon2_parallelism=args.parallelism,
+            ),
+            range(1, 64), args.target_ms, args.samples,
+        )
+        settings = {
+            "PASSWORD_SCHEMES": "argon2,bcrypt",
+            "ARGON2_TIME_COST": chosen and chosen[0],
+            "ARGON2_MEMORY_COST": args.memory_cost,
+            "ARGON2_PARALLELISM": args.parallelism,
+        }
+
+    if chosen is None:
+        raise SystemExit("even the lowest cost exceeds the target; raise --target-ms")
+    print(f"\nchosen cost {chosen[0]} ({chosen[1]:.1f} ms). Set:")
+    for name, value in settings.items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from db import DB_MAX_OVERFLOW, engine, pool_waits, replica_engine, replica_state
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/pool")
+async def pool_status():
+    pool = engine.pool
+    waits = pool_waits["count"]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": waits,
+        "wait_avg_ms": round(pool_waits["total_seconds"] / waits * 1000, 3) if waits else 0.0,
+        "wait_max_ms": round(pool_waits["max_seconds"] * 1000, 3),
+        "replica": _replica_status(),
+    }
+
+
+def _replica_status():
+    if replica_engine is None:
+        return None
+    return {
+        "healthy": replica_state["healthy"],
+        "lag_seconds": replica_state["lag_seconds"],
+        "checked_out": replica_engine.pool.checkedout(),
+        "idle": replica_engine.pool.checkedin(),
+    }
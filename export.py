@@ -0,0 +1,50 @@
+import csv
+import io
+import os
+import orjson
+from enum import Enum
+from fastapi.responses import StreamingResponse
+
+# rows pulled per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+async def _stream_rows(session_factory, query, fmt: ExportFormat):
+    # own session: the request-scoped one may be closed before the body is sent
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_FETCH_SIZE))
+        columns = list(result.keys())
+
+        if fmt is ExportFormat.csv:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        async for rows in result.partitions():
+            if fmt is ExportFormat.csv:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def stream_export(session_factory, query, fmt: ExportFormat, name: str) -> StreamingResponse:
+    """Stream a Core select as NDJSON or CSV straight from a server-side cursor"""
+    return StreamingResponse(
+        _stream_rows(session_factory, query, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
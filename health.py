@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import os
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import func, text
+from sqlalchemy.future import select
+from db import SessionLocal, start_replica_monitor, stop_replica_monitor
+from models import User
+
+router = APIRouter(tags=["health"])
+logger = logging.getLogger(__name__)
+
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+USER_COUNT_REFRESH_SECONDS = float(os.getenv("USER_COUNT_REFRESH_SECONDS", "60"))
+# below this size COUNT(*) is cheap enough; above it we trust the planner estimate
+USER_COUNT_EXACT_BELOW = int(os.getenv("USER_COUNT_EXACT_BELOW", "100000"))
+
+# last known user count, refreshed in the background (None until first refresh)
+user_count = {"value": None}
+_refresher = {"task": None}
+
+
+async def refresh_user_count():
+    """Refresh the cached user count from the planner estimate or COUNT(*)"""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+        )
+        count = result.scalar()
+        if count is None or count < USER_COUNT_EXACT_BELOW:
+            result = await session.execute(select(func.count()).select_from(User))
+            count = result.scalar()
+    user_count["value"] = count
+
+
+async def _refresh_forever():
+    while True:
+        try:
+            await refresh_user_count()
+        except Exception:
+            logger.warning("user count refresh failed", exc_info=True)
+        await asyncio.sleep(USER_COUNT_REFRESH_SECONDS)
+
+
+@router.on_event("startup")
+async def start_user_count_refresher():
+    _refresher["task"] = asyncio.create_task(_refresh_forever())
+
+
+@router.on_event("shutdown")
+async def stop_user_count_refresher():
+    if _refresher["task"]:
+        _refresher["task"].cancel()
+
+
+# replica health/lag for GET routing, probed off the request path (no-op without a replica)
+@router.on_event("startup")
+async def start_replica_probe():
+    start_replica_monitor()
+
+
+@router.on_event("shutdown")
+async def stop_replica_probe():
+    stop_replica_monitor()
+
+
+# -----------------------
+# Liveness (no DB access)
+# -----------------------
+@router.get("/health")
+async def health_check():
+    return {"status": "healthy", "users_count": user_count["value"]}
+
+
+# -----------------------
+# Readiness (pool + SELECT 1)
+# -----------------------
+async def _ping():
+    async with SessionLocal() as session:
+        await session.execute(text("SELECT 1"))
+
+
+@router.get("/ready")
+async def readiness_check():
+    try:
+        await asyncio.wait_for(_ping(), timeout=READINESS_TIMEOUT_SECONDS)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready"}
@@ -0,0 +1,100 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from fastapi import HTTPException
+from security import HASH_WORKERS
+
+#Concurrency limits for bcrypt-heavy routes
+AUTH_CONCURRENCY_LIMIT = int(os.getenv("AUTH_CONCURRENCY_LIMIT", str(HASH_WORKERS)))
+AUTH_QUEUE_SIZE = int(os.getenv("AUTH_QUEUE_SIZE", "32"))
+AUTH_MAX_WAIT_SECONDS = float(os.getenv("AUTH_MAX_WAIT_SECONDS", "5"))
+#Bulk backfills run one at a time by default; extra jobs get a 503 instead of queueing
+BULK_CONCURRENCY_LIMIT = int(os.getenv("BULK_CONCURRENCY_LIMIT", "1"))
+BULK_QUEUE_SIZE = int(os.getenv("BULK_QUEUE_SIZE", "0"))
+
+#Login rate limits (sliding window, per process)
+LOGIN_RATE_WINDOW_SECONDS = float(os.getenv("LOGIN_RATE_WINDOW_SECONDS", "60"))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30"))
+LOGIN_RATE_LIMIT_PER_USERNAME = int(os.getenv("LOGIN_RATE_LIMIT_PER_USERNAME", "10"))
+
+
+def _retry_after(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class ConcurrencyLimiter:
+    """Yield dependency capping concurrent requests, with a bounded wait queue"""
+
+    def __init__(self, limit: int, queue_size: int, max_wait: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self):
+        if self._semaphore.locked() and self.waiting >= self.queue_size:
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers=_retry_after(1))
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers=_retry_after(1))
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+class SlidingWindowLimiter:
+    """In-memory sliding-window log of hits per key, bounded in number of keys"""
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int = 100000):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._hits = OrderedDict()  # key -> deque of hit times, least recent key first
+
+    def hit(self, key: str) -> float:
+        """Record a hit; returns 0 if allowed, else seconds until the next slot frees up"""
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque()
+            if len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+        else:
+            self._hits.move_to_end(key)
+
+        cutoff = now - self.window
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return hits[0] + self.window - now
+        hits.append(now)
+        return 0.0
+
+
+# one limiter per route so a login storm cannot starve signups (and vice versa)
+login_concurrency = ConcurrencyLimiter(AUTH_CONCURRENCY_LIMIT, AUTH_QUEUE_SIZE, AUTH_MAX_WAIT_SECONDS)
+signup_concurrency = ConcurrencyLimiter(AUTH_CONCURRENCY_LIMIT, AUTH_QUEUE_SIZE, AUTH_MAX_WAIT_SECONDS)
+user_update_concurrency = ConcurrencyLimiter(AUTH_CONCURRENCY_LIMIT, AUTH_QUEUE_SIZE, AUTH_MAX_WAIT_SECONDS)
+bulk_signup_concurrency = ConcurrencyLimiter(BULK_CONCURRENCY_LIMIT, BULK_QUEUE_SIZE, AUTH_MAX_WAIT_SECONDS)
+
+login_ip_limiter = SlidingWindowLimiter(LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_WINDOW_SECONDS)
+login_username_limiter = SlidingWindowLimiter(LOGIN_RATE_LIMIT_PER_USERNAME, LOGIN_RATE_WINDOW_SECONDS)
+
+
+def enforce_login_rate_limit(client_ip: str, username: str):
+    """Reject with 429 once an IP or a username exceeds its login budget"""
+    retry_after = login_ip_limiter.hit(client_ip)
+    if not retry_after:
+        retry_after = login_username_limiter.hit(username.lower())
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers=_retry_after(retry_after))
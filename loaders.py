@@ -0,0 +1,114 @@
+import asyncio
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import any_, bindparam, event
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+from pagination import INT4_MAX, INT4_MIN, MAX_PAGE_SIZE
+
+
+def any_of(column, values):
+    """`column = ANY(:ids)`: one array parameter, so one cached statement for any list length"""
+    return column == any_(bindparam("ids", list(values), type_=ARRAY(column.type)))
+
+
+def parse_ids(ids: Optional[str]) -> list:
+    """Turn ?ids=1,2,3 into a de-duplicated list of ints, in request order"""
+    try:
+        values = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+        if any(not INT4_MIN <= value <= INT4_MAX for value in values):
+            raise ValueError("id out of range")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated 32-bit integers")
+    if not values:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(values) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PAGE_SIZE} ids per request")
+    return values
+
+
+def in_request_order(rows, ids) -> list:
+    """Rows sorted to match `ids`; ids with no row are left out"""
+    found = {row.id: row for row in rows}
+    return [found[key] for key in ids if key in found]
+
+
+async def fetch_by_ids(session: AsyncSession, columns, pk, ids: str, *criteria) -> list:
+    """Rows for a ?ids= list, in request order
+
+    The batch alternative to N single-resource GETs: one `pk = ANY(:ids)`
+    query whatever the number of ids. Extra `criteria` narrow the match.
+    """
+    wanted = parse_ids(ids)
+    result = await session.execute(select(*columns).where(any_of(pk, wanted), *criteria))
+    return in_request_order(result.all(), wanted)
+
+
+class PrimaryKeyLoader:
+    """Per-session batching of primary-key lookups for one model
+
+    Keys requested in the same event-loop tick go out as a single
+    `WHERE pk = ANY(:ids)` query; every key is fetched at most once per
+    transaction, so repeated lookups across dependencies are free. Batches
+    of all loaders on a session run one at a time: an AsyncSession cannot
+    execute statements concurrently.
+    """
+
+    def __init__(self, session: AsyncSession, model):
+        self.session = session
+        self.model = model
+        self.pk = model.__mapper__.primary_key[0]
+        self._futures = {}
+        self._queue = []
+        self._dispatch = None
+        # shared by every loader on the session
+        self._lock = session.info.setdefault("loader_lock", asyncio.Lock())
+
+    async def load(self, key):
+        """The row for `key`, or None when it does not exist"""
+        return (await self.load_many([key]))[0]
+
+    async def load_many(self, keys) -> list:
+        """Rows for `keys` in the same order, None for missing ones"""
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            if key not in self._futures:
+                self._futures[key] = loop.create_future()
+                self._queue.append(key)
+        if self._queue and self._dispatch is None:
+            # runs after the current coroutine yields, so concurrent callers join the batch
+            self._dispatch = loop.create_task(self._run_batch())
+        futures = [self._futures[key] for key in keys]
+        return [await future for future in futures]
+
+    async def _run_batch(self):
+        async with self._lock:
+            # keys queued while waiting for the lock ride along in this batch
+            keys, self._queue, self._dispatch = self._queue, [], None
+            try:
+                result = await self.session.execute(select(self.model).where(any_of(self.pk, keys)))
+                found = {getattr(row, self.pk.key): row for row in result.scalars()}
+            except Exception as exc:
+                for key in keys:
+                    # forget the failure so a later load can retry
+                    self._futures.pop(key).set_exception(exc)
+                return
+        for key in keys:
+            self._futures[key].set_result(found.get(key))
+
+
+def get_loader(session: AsyncSession, model) -> PrimaryKeyLoader:
+    """The loader for `model` bound to this session (and so to this request)"""
+    loaders = session.info.setdefault("loaders", {})
+    loader = loaders.get(model)
+    if loader is None:
+        loader = loaders[model] = PrimaryKeyLoader(session, model)
+    return loader
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_loaders(session):
+    # loaded rows may predate this commit's writes
+    session.info.pop("loaders", None)
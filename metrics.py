@@ -0,0 +1,275 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from fastapi import APIRouter, Response
+from sqlalchemy import event
+
+router = APIRouter(tags=["metrics"])
+logger = logging.getLogger(__name__)
+
+#Opt-in query instrumentation: slow-query log, query budgets, X-DB-Queries/Server-Timing
+DB_INSTRUMENTATION = os.getenv("DB_INSTRUMENTATION", "false").lower() in ("1", "true", "yes", "on")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# raise instead of warn when a route goes over budget (set in test runs)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes", "on")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+# -----------------------
+# Metric primitives (Prometheus text exposition)
+# -----------------------
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()  # hash pool threads record too
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for labels, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts (last slot is +Inf) and running sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class CacheStat(_Metric):
+    """One stats() field of every tracked cache, read at scrape time"""
+
+    def __init__(self, name: str, help: str, field: str, type: str):
+        self.field = field
+        self.type = type
+        super().__init__(name, help, ("cache",))
+
+    def render(self) -> list:
+        self._series = {}
+        for cache_name, cache in TRACKED_CACHES.items():
+            value = cache.stats().get(self.field)
+            if value is not None:
+                self._series[(cache_name,)] = value
+        return super().render()
+
+
+REGISTRY = []
+# name -> object with a stats() dict (TTLCache or a response cache backend)
+TRACKED_CACHES = {}
+
+
+def track_cache(name: str, cache):
+    """Export a cache's hits, misses and size on /metrics"""
+    TRACKED_CACHES[name] = cache
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------
+# Application metrics
+# -----------------------
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued per request", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "SQL statement execution time", ("operation",))
+DB_POOL_WAIT = Histogram("db_pool_wait_seconds", "Time waiting for a pooled connection")
+PASSWORD_HASH_LATENCY = Histogram(
+    "password_hash_duration_seconds", "Password hash/verify CPU time", ("operation",),
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+CACHE_HITS = CacheStat("cache_hits_total", "In-process cache hits", "hits", "counter")
+CACHE_MISSES = CacheStat("cache_misses_total", "In-process cache misses", "misses", "counter")
+CACHE_ENTRIES = CacheStat("cache_entries", "Entries held by an in-process cache", "size", "gauge")
+
+
+class RequestStats:
+    """Per-request DB counters, filled in by the engine hooks"""
+    __slots__ = ("scope", "queries", "db_seconds", "budget", "over_budget_reported")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.budget = None
+        self.over_budget_reported = False
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised (in strict mode) when a request issues more queries than its route declared"""
+
+
+def query_budget(max_queries: int):
+    """Dependency declaring how many SQL statements a route may issue"""
+    async def declare_query_budget():
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+    return declare_query_budget
+
+
+def _check_budget(stats: RequestStats):
+    if stats.budget is None or stats.queries <= stats.budget or stats.over_budget_reported:
+        return
+    stats.over_budget_reported = True
+    message = f"{stats.route} issued {stats.queries} queries, budget is {stats.budget}"
+    if QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def _params_shape(parameters, executemany: bool) -> str:
+    # types only: never log values
+    if executemany:
+        return f"{len(parameters)} rows of {_params_shape(parameters[0], False) if parameters else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+current_request_stats: ContextVar = ContextVar("current_request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = current_request_stats.set(stats)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if DB_INSTRUMENTATION:
+                    _check_budget(stats)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-queries", str(stats.queries).encode()),
+                        (b"server-timing", f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"'.encode()),
+                    ]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_LATENCY.observe(elapsed, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status[0]))
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, path)
+            current_request_stats.reset(token)
+            if DB_INSTRUMENTATION and not QUERY_BUDGET_STRICT:
+                # streamed bodies can keep querying after the headers went out
+                _check_budget(stats)
+
+
+def instrument_engine(sync_engine):
+    """Attach statement timing and per-request query counting to an engine"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        DB_QUERY_LATENCY.observe(elapsed, statement.split(None, 1)[0].upper())
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+        if DB_INSTRUMENTATION and elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning(
+                "slow query %.1f ms on %s: %s params=%s",
+                elapsed * 1000,
+                stats.route if stats is not None else "-",
+                " ".join(statement.split())[:500],
+                _params_shape(parameters, executemany),
+            )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,39 @@
+"""add users trigram indexes
+
+Revision ID: 7d2a4c91e5b3
+Revises: c3933bf0e8c7
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a4c91e5b3'
+down_revision: Union[str, Sequence[str], None] = 'c3933bf0e8c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY: users stays writable during the GIN builds; needs autocommit
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_username_trgm', 'users', ['username'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+        op.create_index('ix_users_email_trgm', 'users', ['email'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # the pg_trgm extension is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_username_trgm', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,45 @@
+"""add posts search vector
+
+Revision ID: a81f3e6b0c24
+Revises: 7d2a4c91e5b3
+Create Date: 2026-10-17 10:03:18.442917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81f3e6b0c24'
+down_revision: Union[str, Sequence[str], None] = '7d2a4c91e5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # adding a stored generated column rewrites the posts table once
+    op.add_column('posts', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', content), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    # CONCURRENTLY: posts stays writable during the GIN build; needs autocommit
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_search_vector', 'posts', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_search_vector', table_name='posts', postgresql_concurrently=True)
+    op.drop_column('posts', 'search_vector')
@@ -0,0 +1,34 @@
+"""posts (created_at DESC, id DESC) index for the global keyset
+
+Revision ID: b4e91f07d2c8
+Revises: f3b8d21c6a47
+Create Date: 2026-10-17 18:42:51.206114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e91f07d2c8'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d21c6a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # backs newest_first() without a user_id filter: GET /posts/ and /posts/feed
+    # read pages in index order instead of top-N sorting the whole table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_created_at_id', 'posts',
+                        [sa.text('created_at DESC'), sa.text('id DESC')],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_created_at_id', table_name='posts', postgresql_concurrently=True)
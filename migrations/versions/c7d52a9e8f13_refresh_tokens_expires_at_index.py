@@ -0,0 +1,33 @@
+"""index refresh_tokens.expires_at for the expired-token purge
+
+Revision ID: c7d52a9e8f13
+Revises: b4e91f07d2c8
+Create Date: 2026-10-17 19:05:33.918240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d52a9e8f13'
+down_revision: Union[str, Sequence[str], None] = 'b4e91f07d2c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # purge_expired_refresh_tokens() deletes by expires_at in batches
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens',
+                      postgresql_concurrently=True)
@@ -0,0 +1,42 @@
+"""posts timeline index, drop redundant indexes
+
+Revision ID: f3b8d21c6a47
+Revises: e5c07d9a3b16
+Create Date: 2026-10-17 15:20:07.581390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d21c6a47'
+down_revision: Union[str, Sequence[str], None] = 'e5c07d9a3b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY: posts stays writable during the build; needs autocommit
+    with op.get_context().autocommit_block():
+        # serves user timelines in index order; INCLUDE(title) makes summary pages index-only
+        op.create_index('ix_posts_user_id_created_at_id', 'posts',
+                        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+                        unique=False, postgresql_include=['title'], postgresql_concurrently=True)
+        # primary keys already have a unique index; user_id is the prefix of the new index
+        op.drop_index(op.f('ix_posts_user_id'), table_name='posts', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_posts_id'), table_name='posts', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_users_id'), table_name='users', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_posts_id'), 'posts', ['id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_posts_user_id'), 'posts', ['user_id'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index('ix_posts_user_id_created_at_id', table_name='posts', postgresql_concurrently=True)
@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Text, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from db import Base
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=True)
@@ -14,15 +15,55 @@ class User(Base):
     #relationship to posts
     posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
 
+    # trigram indexes so leading-wildcard and fuzzy search avoid a seq scan
+    __table_args__ = (
+        Index("ix_users_username_trgm", "username", postgresql_using="gin",
+              postgresql_ops={"username": "gin_trgm_ops"}),
+        Index("ix_users_email_trgm", "email", postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}),
+    )
+
 
 class Post(Base):
     __tablename__ = "posts"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=False, index=True)
     content = Column(Text, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # generated full-text document (title weighted above content); deferred so
+    # ordinary loads never pull it
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', title), 'A') || "
+        "setweight(to_tsvector('english', content), 'B')",
+        persisted=True,
+    )))
+
     # ORM relationship
-    author = relationship("User", back_populates="posts")
\ No newline at end of file
+    author = relationship("User", back_populates="posts")
+
+    __table_args__ = (
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        # global newest-first keyset (list_posts, posts_feed)
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()),
+        # per-user timeline in index order (also serves user_id lookups and the FK cascade)
+        Index("ix_posts_user_id_created_at_id", user_id, created_at.desc(), id.desc(),
+              postgresql_include=["title"]),
+    )
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # SHA-256 of the opaque token; the token itself is never stored
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    # every rotation of one login shares a family, so reuse can revoke them all
+    family_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # range-scanned by the expired-token purge
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,58 @@
+import base64
+import json
+import math
+from datetime import datetime
+from fastapi import HTTPException
+
+# Page size limits shared by every list endpoint
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Postgres INTEGER range; anything outside it fails the int4 bind with a 500
+INT4_MIN, INT4_MAX = -2**31, 2**31 - 1
+
+
+def encode_cursor(*values) -> str:
+    """Pack the keyset values of the last row into an opaque cursor"""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_value(t, v):
+    # strict: no truncating 2.7 to id 2, no NaN/Infinity ranks, no numeric strings
+    if t is datetime:
+        return datetime.fromisoformat(v)
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        raise TypeError("cursor value is not a number")
+    if t is int:
+        if not isinstance(v, int):
+            raise ValueError("cursor id is not an integer")
+        if not INT4_MIN <= v <= INT4_MAX:
+            raise ValueError("cursor id out of range")
+        return v
+    if not math.isfinite(v):
+        raise ValueError("cursor rank is not finite")
+    return t(v)
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """Unpack a cursor into keyset values of the given types"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor shape mismatch")
+        return [_decode_value(t, v) for t, v in zip(types, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(rows: list, limit: int, key):
+    """Trim the look-ahead row and build the cursor for the next page"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
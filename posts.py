@@ -1,11 +1,20 @@
 # posts.py (recommended; copy/paste)
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, tuple_, update
 from sqlalchemy.future import select
-from db import get_db
-from models import Post
+from db import SEARCH_STATEMENT_TIMEOUT_MS, db_with_statement_timeout, get_db, get_read_db, read_session_factory
+from models import Post, User
+from bulk import BulkItemResult, BulkResult, summarize, validate_items
+from export import ExportFormat, stream_export
+from responses import cached_json_response, invalidate_response
+from projection import parse_fields, project_rows, select_columns
+from loaders import fetch_by_ids, get_loader
+from metrics import query_budget
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, paginate
 from datetime import datetime
 
 # import get_current_user from auth — if circular imports occur, move this import inside endpoints
@@ -14,9 +23,13 @@ from auth import get_current_user
 router = APIRouter(prefix="/posts", tags=["posts"])
 
 class PostIn(BaseModel):
-    title: str
+    title: str = Field(..., max_length=200)
     content: str
 
+class PostPatch(BaseModel):
+    title: Optional[str] = Field(None, max_length=200)
+    content: Optional[str] = None
+
 class PostOut(BaseModel):
     id: int
     title: str
@@ -27,9 +40,60 @@ class PostOut(BaseModel):
     class Config:
         orm_mode = True
 
-@router.post("/", response_model=PostOut, status_code=status.HTTP_201_CREATED)
+# PostOut as plain columns for the list, feed, search and export queries
+POST_OUT_COLUMNS = (Post.id, Post.title, Post.content, Post.user_id, Post.created_at)
+
+# title-only listing columns, all covered by ix_posts_user_id_created_at_id
+POST_SUMMARY_COLUMNS = (Post.id, Post.title, Post.user_id, Post.created_at)
+
+# ?fields= vocabulary; lists leave the content Text column out unless asked for
+POST_FIELDS = tuple(column.key for column in POST_OUT_COLUMNS)
+POST_LIST_DEFAULT_FIELDS = tuple(column.key for column in POST_SUMMARY_COLUMNS)
+FIELDS_QUERY = Query(None, description="Comma-separated subset of " + ",".join(POST_FIELDS))
+
+class PostFields(BaseModel):
+    id: Optional[int] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class PostPage(BaseModel):
+    items: List[PostFields]
+    next_cursor: Optional[str] = None
+
+class PostSummary(BaseModel):
+    id: int
+    title: str
+    user_id: int
+    created_at: datetime
+
+class PostSummaryPage(BaseModel):
+    items: List[PostSummary]
+    next_cursor: Optional[str] = None
+
+class AuthorSummary(BaseModel):
+    username: str
+    full_name: Optional[str] = None
+
+class FeedItem(PostOut):
+    author: AuthorSummary
+
+class FeedPage(BaseModel):
+    items: List[FeedItem]
+    next_cursor: Optional[str] = None
+
+class PostSearchHit(PostOut):
+    rank: float
+    snippet: str  # HTML-escaped excerpt; matches wrapped in <mark>
+
+class PostSearchPage(BaseModel):
+    items: List[PostSearchHit]
+    next_cursor: Optional[str] = None
+
+@router.post("/", response_model=PostOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(3))])
 async def create_post(post_in: PostIn, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
-    # current_user is a models.User SQLAlchemy object
+    # current_user is an auth.CurrentUser (cached principal, not an ORM object)
     new_post = Post(
         title=post_in.title,
         content=post_in.content,
@@ -40,47 +104,172 @@ async def create_post(post_in: PostIn, db: AsyncSession = Depends(get_db), curre
     await db.refresh(new_post)
     return new_post
 
-@router.get("/", response_model=List[PostOut])
-async def list_posts(user_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
-    q = select(Post)
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_posts(items: List[Dict[str, Any]], db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
+    valid, results = validate_items(PostIn, items)
+    if valid:
+        rows = [{"title": p.title, "content": p.content, "user_id": current_user.id} for _, p in valid]
+        # executemany with batched multi-row VALUES; ids come back in input order
+        result = await db.execute(insert(Post).returning(Post.id, sort_by_parameter_order=True), rows)
+        for (index, _), post_id in zip(valid, result.scalars().all()):
+            results[index] = BulkItemResult(index=index, id=post_id)
+        await db.commit()
+    return summarize(results, len(items))
+
+def newest_first(q, limit: int, cursor: Optional[str]):
+    """Order by (created_at, id) DESC and apply the keyset cursor; deep pages cost the same as page 1"""
+    q = q.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1)
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        q = q.where(tuple_(Post.created_at, Post.id) < tuple_(last_created_at, last_id))
+    return q
+
+@router.get("/", response_model=PostPage, response_class=ORJSONResponse, dependencies=[Depends(query_budget(1))])
+async def list_posts(
+    user_id: Optional[int] = None,
+    ids: Optional[str] = Query(None, description="Comma-separated post ids to fetch in one query (no paging)"),
+    fields: Optional[str] = FIELDS_QUERY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # only the requested columns are read; created_at/id always ride along for the cursor
+    names = parse_fields(fields, POST_FIELDS, POST_LIST_DEFAULT_FIELDS)
+    columns = select_columns(POST_OUT_COLUMNS, names, required=("created_at", "id"))
+    if ids:
+        owner = [Post.user_id == user_id] if user_id else []
+        posts = await fetch_by_ids(db, columns, Post.id, ids, *owner)
+        return ORJSONResponse({"items": project_rows(posts, names), "next_cursor": None})
+
+    q = newest_first(select(*columns), limit, cursor)
     if user_id:
         q = q.where(Post.user_id == user_id)
     result = await db.execute(q)
-    return result.scalars().all()
+    posts, next_cursor = paginate(result.all(), limit, lambda p: (p.created_at, p.id))
+    return ORJSONResponse({"items": project_rows(posts, names), "next_cursor": next_cursor})
 
-@router.get("/{post_id}", response_model=PostOut)
-async def get_post(post_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalars().first()
-    if not post:
+@router.get("/feed", response_model=FeedPage, response_class=ORJSONResponse, dependencies=[Depends(query_budget(1))])
+async def posts_feed(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # the page of posts is cut first (ix_posts_created_at_id range scan + LIMIT), then
+    # only those rows join users by primary key: one query, cost independent of table size
+    page = newest_first(select(*POST_OUT_COLUMNS), limit, cursor).subquery()
+    q = (
+        select(page, User.username, User.full_name)
+        .join(User, User.id == page.c.user_id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    result = await db.execute(q)
+    rows, next_cursor = paginate(result.all(), limit, lambda p: (p.created_at, p.id))
+
+    items = []
+    for row in rows:
+        item = row._asdict()
+        item["author"] = {"username": item.pop("username"), "full_name": item.pop("full_name")}
+        items.append(item)
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+@router.get("/export")
+async def export_posts(request: Request, user_id: Optional[int] = None, format: ExportFormat = ExportFormat.ndjson):
+    q = select(*POST_OUT_COLUMNS).order_by(Post.id)
+    if user_id:
+        q = q.where(Post.user_id == user_id)
+    return stream_export(await read_session_factory(request), q, format, "posts")
+
+SEARCH_CONFIG = "english"
+SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+def _html_escape(column):
+    """SQL-side HTML escaping of & < > " ' (& first so entities aren't double-escaped)"""
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        column = func.replace(column, char, entity)
+    return column
+
+@router.get("/search", response_model=PostSearchPage, response_class=ORJSONResponse, dependencies=[Depends(query_budget(2))])
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(db_with_statement_timeout(SEARCH_STATEMENT_TIMEOUT_MS, read_only=True))
+):
+    # GIN index on the generated search_vector; keyset on (rank, id)
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank(Post.search_vector, ts_query)
+    # snippet is safe HTML: escaped content, with only the <mark> tags unescaped
+    snippet = func.ts_headline(SEARCH_CONFIG, _html_escape(Post.content), ts_query, SNIPPET_OPTIONS)
+
+    stmt = (
+        select(*POST_OUT_COLUMNS, rank.label("rank"), snippet.label("snippet"))
+        .where(Post.search_vector.op("@@")(ts_query))
+        .order_by(rank.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, float, int)
+        stmt = stmt.where(tuple_(rank, Post.id) < tuple_(last_rank, last_id))
+
+    result = await db.execute(stmt)
+    rows, next_cursor = paginate(result.all(), limit, lambda r: (r.rank, r.id))
+    return ORJSONResponse({"items": [row._asdict() for row in rows], "next_cursor": next_cursor})
+
+@router.get("/{post_id}", response_model=PostOut, dependencies=[Depends(query_budget(1))])
+async def get_post(post_id: int, request: Request, fields: Optional[str] = FIELDS_QUERY, db: AsyncSession = Depends(get_db)):
+    names = parse_fields(fields, POST_FIELDS)
+
+    async def render():
+        post = await get_loader(db, Post).load(post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        return PostOut.from_orm(post).json().encode()
+
+    return await cached_json_response(request, f"post:{post_id}", render, names if fields else None)
+
+async def _raise_missing_or_forbidden(post_id: int, action: str, db: AsyncSession):
+    # only reached when the owner-scoped statement matched nothing
+    result = await db.execute(select(Post.id).where(Post.id == post_id))
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Post not found")
+    raise HTTPException(status_code=403, detail=f"Not authorized to {action} this post")
+
+async def _update_own_post(post_id: int, changes: dict, db: AsyncSession, current_user):
+    # single UPDATE ... WHERE id AND owner RETURNING
+    for field, value in changes.items():
+        if value is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+
+    owned = (Post.id == post_id, Post.user_id == current_user.id)
+    if changes:
+        result = await db.execute(update(Post).where(*owned).values(**changes).returning(Post))
+        post = result.scalars().first()
+        await db.commit()
+    else:
+        result = await db.execute(select(Post).where(*owned))
+        post = result.scalars().first()
+
+    if not post:
+        await _raise_missing_or_forbidden(post_id, "edit", db)
+    await invalidate_response(f"post:{post_id}")
     return post
 
-@router.put("/{post_id}", response_model=PostOut)
+@router.put("/{post_id}", response_model=PostOut, dependencies=[Depends(query_budget(3))])
 async def update_post(post_id: int, post_in: PostIn, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalars().first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    if post.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to edit this post")
+    return await _update_own_post(post_id, post_in.dict(), db, current_user)
 
-    post.title = post_in.title
-    post.content = post_in.content
-    db.add(post)
-    await db.commit()
-    await db.refresh(post)
-    return post
+@router.patch("/{post_id}", response_model=PostOut, dependencies=[Depends(query_budget(3))])
+async def patch_post(post_id: int, post_in: PostPatch, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
+    return await _update_own_post(post_id, post_in.dict(exclude_unset=True), db, current_user)
 
-@router.delete("/{post_id}")
+@router.delete("/{post_id}", dependencies=[Depends(query_budget(3))])
 async def delete_post(post_id: int, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalars().first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    if post.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this post")
+    result = await db.execute(
+        delete(Post).where(Post.id == post_id, Post.user_id == current_user.id).returning(Post.id)
+    )
+    if result.scalar() is None:
+        await _raise_missing_or_forbidden(post_id, "delete", db)
 
-    await db.delete(post)
     await db.commit()
-    return {"message": f"Post {post.id} deleted"}
+    await invalidate_response(f"post:{post_id}")
+    return {"message": f"Post {post_id} deleted"}
@@ -0,0 +1,33 @@
+from typing import Optional
+import orjson
+from fastapi import HTTPException
+
+
+def parse_fields(fields: Optional[str], allowed, default=None) -> tuple:
+    """Validate a ?fields=a,b list against `allowed`; keeps the schema's field order"""
+    if not fields:
+        return tuple(default or allowed)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise HTTPException(status_code=400, detail="No fields requested")
+    return tuple(name for name in allowed if name in requested)
+
+
+def select_columns(columns, names, required=()) -> list:
+    """The requested columns plus any the query needs anyway (keyset, cursor)"""
+    by_name = {column.key: column for column in columns}
+    return [by_name[name] for name in dict.fromkeys((*names, *required))]
+
+
+def project_rows(rows, names) -> list:
+    """Row mappings trimmed to the requested fields, ready for orjson"""
+    return [{name: row._mapping[name] for name in names} for row in rows]
+
+
+def project_body(body: bytes, names) -> bytes:
+    """Re-serialize a cached full JSON object with only the requested fields"""
+    full = orjson.loads(body)
+    return orjson.dumps({name: full[name] for name in names})
@@ -0,0 +1,112 @@
+import hashlib
+import logging
+import os
+import time
+from fastapi import Request, Response
+from starlette.middleware.gzip import GZipMiddleware
+from cache import CacheBackend, LocalCacheBackend, TTLCache
+from db import wrote_recently
+from metrics import track_cache
+from projection import project_body
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # optional: pip install brotli-asgi
+    BrotliMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+# TTL bounds staleness across workers, which only see their own invalidations
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+
+response_cache: CacheBackend = LocalCacheBackend(
+    maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS
+)
+track_cache("response", response_cache)
+# key -> monotonic time of the last invalidation, so reads that raced a write don't re-cache it
+_invalidated_at = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
+# Opt-in body compression (off | gzip | br); leave off when a proxy already compresses
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "off").lower()
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_ENABLED = RESPONSE_COMPRESSION in ("gzip", "br")
+
+
+async def cached_response(request: Request, key: str):
+    """The cached (body, etag) entry, or None on a miss or right after the caller wrote"""
+    if wrote_recently(request):
+        # read-your-writes: don't hand a writer an entry filled before its commit
+        return None
+    return await response_cache.get(key)
+
+
+async def store_response(key: str, entry: tuple, read_started: float):
+    """Cache an entry read from the primary at `read_started` unless it may already be stale"""
+    invalidated = _invalidated_at.get(key)
+    if invalidated is not None and invalidated >= read_started:
+        # the read began before a write to this key committed
+        return
+    await response_cache.set(key, entry)
+
+
+async def invalidate_response(key: str):
+    """Drop a cached entry after a write and fence off reads already in flight"""
+    _invalidated_at.set(key, time.monotonic())
+    await response_cache.delete(key)
+
+
+def make_etag(body: bytes) -> str:
+    """ETag over the uncompressed response bytes
+
+    Strong by default. With compression on, the middleware re-encodes the body
+    after the tag is set, so it is sent weak: a strong validator must differ
+    between content codings (RFC 9110 8.8.3).
+    """
+    tag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return "W/" + tag if COMPRESSION_ENABLED else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+
+def json_response_with_etag(request: Request, body: bytes, etag: str) -> Response:
+    """Full JSON response, or 304 when the client already holds this representation"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+async def cached_json_response(request: Request, key: str, render, fields=None) -> Response:
+    """One resource as ETag'd JSON, from the response cache or `render()` on a miss
+
+    A hit (including If-None-Match -> 304) never touches the DB. `render` must
+    read the primary, so the body is current and safe to cache (a replica may
+    lag); it returns the full JSON body or raises. One full entry is cached per
+    key and sparse `fields` views are cut from it.
+    """
+    entry = await cached_response(request, key)
+    if entry is None:
+        read_started = time.monotonic()
+        body = await render()
+        entry = (body, make_etag(body))
+        await store_response(key, entry, read_started)
+    if fields:
+        body = project_body(entry[0], fields)
+        entry = (body, make_etag(body))
+    return json_response_with_etag(request, *entry)
+
+
+def add_compression(app):
+    """Compress bodies of at least COMPRESSION_MIN_SIZE bytes for clients that accept it"""
+    if RESPONSE_COMPRESSION == "br" and BrotliMiddleware is not None:
+        # serves gzip to clients that do not send "br" in Accept-Encoding
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+    elif COMPRESSION_ENABLED:
+        if RESPONSE_COMPRESSION == "br":
+            logger.warning("RESPONSE_COMPRESSION=br but brotli-asgi is not installed, using gzip")
+        app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
@@ -1,16 +1,87 @@
 from passlib.context import CryptContext
 #from passlib.hash import bcrypt
 from jose import JWTError, jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
+from cache import TTLCache
+from metrics import PASSWORD_HASH_LATENCY, track_cache
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+
+#Password hashing: the first scheme hashes new passwords, the others only verify
+PASSWORD_SCHEMES = [name.strip() for name in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if name.strip()]
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+def build_password_context(
+    schemes: list = PASSWORD_SCHEMES,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST,
+    argon2_parallelism: int = ARGON2_PARALLELISM,
+) -> CryptContext:
+    """Build a CryptContext that flags any hash with other cost parameters as needing an update"""
+    settings = {}
+    if "bcrypt" in schemes:
+        settings.update(
+            bcrypt__default_rounds=bcrypt_rounds,
+            bcrypt__min_rounds=bcrypt_rounds,
+            bcrypt__max_rounds=bcrypt_rounds,
+        )
+    if "argon2" in schemes:
+        settings.update(
+            argon2__default_rounds=argon2_time_cost,
+            argon2__min_rounds=argon2_time_cost,
+            argon2__max_rounds=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_cost,
+            argon2__parallelism=argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
 
 #create password context
-pwd_context = CryptContext(schemes = ["bcrypt"], deprecated = "auto")
+pwd_context = build_password_context()
 
 #JWT Configuration
 SECRET_KEY = "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+#Password hashing pool: bcrypt releases the GIL, so threads run hashes in parallel
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "64"))
+#Bulk hashing runs in small batches on part of the pool so logins still get through
+BULK_HASH_BATCH = int(os.getenv("BULK_HASH_BATCH", "32"))
+BULK_HASH_CONCURRENCY = int(os.getenv("BULK_HASH_CONCURRENCY", str(max(1, HASH_WORKERS // 2))))
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwd-hash")
+_hash_jobs = 0  # running + queued jobs in _hash_executor
+# process-wide: concurrent bulk requests share these slots, never the whole pool
+_bulk_hash_gate = asyncio.Semaphore(BULK_HASH_CONCURRENCY)
+
+
+#Verified-token cache keyed by token digest; entries never outlive the token's exp
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_MAX_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+# rejections live in their own, smaller cache: a garbage-token flood churns
+# only this one and can never evict verified tokens
+TOKEN_REJECT_CACHE_SIZE = int(os.getenv("TOKEN_REJECT_CACHE_SIZE", "1000"))
+TOKEN_REJECT_TTL_SECONDS = float(os.getenv("TOKEN_REJECT_TTL_SECONDS", "10"))
+
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_MAX_TTL_SECONDS)
+_rejected_tokens = TTLCache(maxsize=TOKEN_REJECT_CACHE_SIZE, ttl=TOKEN_REJECT_TTL_SECONDS)
+track_cache("token", _token_cache)
+track_cache("token_rejected", _rejected_tokens)
+
+
+class HashQueueFull(Exception):
+    """Raised when too many password hash jobs are already waiting"""
 
 def hash_password(password: str) -> str:
     """Hash a password with salt"""
@@ -20,6 +91,67 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Verify a password; also returns a new hash when the stored one uses outdated parameters"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _timed(fn, *args):
+    """Run one hash/verify call, recording its duration under the function name"""
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASH_LATENCY.observe(time.perf_counter() - started, fn.__name__)
+
+async def _run_in_hash_pool(fn, *args):
+    """Run a hashing call on the hash pool, refusing work past the queue limit"""
+    global _hash_jobs
+    if _hash_jobs >= HASH_QUEUE_LIMIT:
+        raise HashQueueFull()
+    _hash_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_jobs -= 1
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_in_hash_pool(_timed, hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await _run_in_hash_pool(_timed, verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    """verify_and_update_password without blocking the event loop"""
+    return await _run_in_hash_pool(_timed, verify_and_update_password, plain_password, hashed_password)
+
+def is_password_hash(value: str) -> bool:
+    """Whether `value` is a well-formed hash of one of the configured schemes"""
+    scheme = pwd_context.identify(value, required=False)
+    if scheme is None:
+        return False
+    try:
+        pwd_context.handler(scheme).from_string(value)
+    except ValueError:
+        return False
+    return True
+
+def _hash_many(passwords: list) -> list:
+    # one histogram sample per hash, so bulk batches don't skew the per-hash latency
+    return [_timed(hash_password, p) for p in passwords]
+
+async def hash_passwords_async(passwords: list) -> list:
+    """Hash many passwords in parallel batches, preserving order"""
+    async def run(batch):
+        async with _bulk_hash_gate:
+            return await _run_in_hash_pool(_hash_many, batch)
+
+    batches = [passwords[i:i + BULK_HASH_BATCH] for i in range(0, len(passwords), BULK_HASH_BATCH)]
+    results = await asyncio.gather(*(run(batch) for batch in batches))
+    return [hashed for batch in results for hashed in batch]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Generate JWT access token"""
     to_encode = data.copy()
@@ -35,13 +167,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str):
-    """Verify and decode JWT token"""
+def decode_token(token: str):
+    """Verify and decode JWT token, returning the claims or None"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")  # ✅ stick with "sub"
         if user_id is None:
             return None
-        return {"sub": int(user_id)}  # ✅ match naming
-    except JWTError:
-        return None
\ No newline at end of file
+        return {"sub": int(user_id), "exp": payload.get("exp")}  # ✅ match naming
+    except (JWTError, ValueError):
+        return None
+
+
+def verify_token(token: str):
+    """Verify JWT token, memoizing the outcome per token digest"""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
+    if _rejected_tokens.get(key) is not None:
+        return None
+
+    payload = decode_token(token)
+    if payload is None:
+        # remember garbage briefly so floods of the same bad token stay cheap
+        _rejected_tokens.set(key, True)
+        return None
+
+    ttl = TOKEN_CACHE_MAX_TTL_SECONDS
+    if payload["exp"] is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def generate_refresh_token() -> str:
+    """Opaque, high-entropy refresh token"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Fast digest for storage; refresh tokens are random, so bcrypt buys nothing"""
+    return hashlib.sha256(token.encode()).hexdigest()
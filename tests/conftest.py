@@ -0,0 +1,9 @@
+import os
+import sys
+
+# test runs count queries and fail routes that go over their declared budget;
+# metrics reads these at import time, so set them before anything imports it
+os.environ.setdefault("DB_INSTRUMENTATION", "1")
+os.environ.setdefault("QUERY_BUDGET_STRICT", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+import limits
+from limits import ConcurrencyLimiter, SlidingWindowLimiter, enforce_login_rate_limit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(limits.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_sliding_window_blocks_until_oldest_hit_expires(clock):
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=60)
+    assert limiter.hit("a") == 0
+    clock[0] += 10
+    assert limiter.hit("a") == 0
+    clock[0] += 5
+    assert limiter.hit("a") == pytest.approx(45)
+    assert limiter.hit("b") == 0  # other keys have their own budget
+
+    clock[0] += 45
+    assert limiter.hit("a") == 0
+
+
+def test_sliding_window_forgets_least_recent_keys(clock):
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+    assert limiter.hit("a") == 0  # evicted, so its budget starts over
+    assert limiter.hit("c") > 0
+
+
+@pytest.fixture
+def login_app(monkeypatch):
+    monkeypatch.setattr(limits, "login_ip_limiter", SlidingWindowLimiter(3, 60))
+    monkeypatch.setattr(limits, "login_username_limiter", SlidingWindowLimiter(1, 60))
+    app = FastAPI()
+
+    async def rate_limit(request: Request, username: str):
+        enforce_login_rate_limit(request.client.host, username)
+
+    @app.post("/login", dependencies=[Depends(rate_limit)])
+    async def login():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_login_over_username_budget_is_a_429(login_app):
+    assert login_app.post("/login?username=Alice").status_code == 200
+    response = login_app.post("/login?username=alice")  # usernames are case-folded
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 59
+
+
+def test_login_over_ip_budget_is_a_429(login_app):
+    for name in ("a", "b", "c"):
+        assert login_app.post(f"/login?username={name}").status_code == 200
+    response = login_app.post("/login?username=d")
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+
+
+async def _enter(limiter):
+    slot = limiter()
+    await slot.__anext__()
+    return slot
+
+
+async def _leave(slot):
+    with pytest.raises(StopAsyncIteration):
+        await slot.__anext__()
+
+
+def test_concurrency_limiter_sheds_when_queue_is_full():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=0, max_wait=1)
+        slot = await _enter(limiter)
+        with pytest.raises(HTTPException) as exc:
+            await _enter(limiter)
+        await _leave(slot)
+        await _leave(await _enter(limiter))  # the freed slot is usable again
+        return exc.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+
+
+def test_concurrency_limiter_gives_up_after_max_wait():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, max_wait=0.01)
+        slot = await _enter(limiter)
+        with pytest.raises(HTTPException) as exc:
+            await _enter(limiter)
+        assert limiter.waiting == 0
+        await _leave(slot)
+        return exc.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+
+
+def test_concurrency_limiter_queued_request_gets_the_freed_slot():
+    async def run():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1, max_wait=1)
+        slot = await _enter(limiter)
+        waiter = asyncio.create_task(_enter(limiter))
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        await _leave(slot)
+        await _leave(await waiter)
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from loaders import get_loader
+from models import Post, User
+
+
+class FakeSession:
+    """Records executed id batches and fails on overlapping executes, like AsyncSession"""
+
+    def __init__(self):
+        self.info = {}
+        self.batches = []
+        self._executing = False
+
+    async def execute(self, statement):
+        if self._executing:
+            raise RuntimeError("concurrent execute on one session")
+        self._executing = True
+        try:
+            ids = statement.compile().params["ids"]
+            self.batches.append(sorted(ids))
+            await asyncio.sleep(0.01)
+            rows = [SimpleNamespace(id=key) for key in ids if key > 0]
+            return SimpleNamespace(scalars=lambda: rows)
+        finally:
+            self._executing = False
+
+
+@pytest.fixture
+def session():
+    return FakeSession()
+
+
+def test_same_tick_loads_share_one_query(session):
+    async def run():
+        loader = get_loader(session, User)
+        return await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(-1))
+
+    first, second, again, missing = asyncio.run(run())
+    assert session.batches == [[-1, 1, 2]]
+    assert (first.id, second.id, again) == (1, 2, first)
+    assert missing is None
+
+
+def test_load_during_in_flight_batch_waits_for_it(session):
+    async def run():
+        loader = get_loader(session, User)
+        first = asyncio.create_task(loader.load(1))
+        await asyncio.sleep(0.001)  # first batch is now executing
+        second = await loader.load(2)
+        return await first, second
+
+    first, second = asyncio.run(run())
+    assert session.batches == [[1], [2]]
+    assert (first.id, second.id) == (1, 2)
+
+
+def test_loaders_for_different_models_take_turns(session):
+    async def run():
+        return await asyncio.gather(get_loader(session, User).load(1), get_loader(session, Post).load(2))
+
+    user, post = asyncio.run(run())
+    assert sorted(session.batches) == [[1], [2]]
+    assert (user.id, post.id) == (1, 2)
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import INT4_MAX, decode_cursor, encode_cursor
+
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    created_at = datetime(2026, 10, 17, 9, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor, datetime, int) == [created_at, 42]
+    assert decode_cursor(encode_cursor(0.25, 7), float, int) == [0.25, 7]
+
+
+def test_integral_rank_is_accepted():
+    assert decode_cursor(raw_cursor("[1,7]"), float, int) == [1.0, 7]
+
+
+@pytest.mark.parametrize("text, types", [
+    ("[2.7]", (int,)),            # would truncate to id 2
+    ('["5"]', (int,)),            # numeric string
+    ("[true]", (int,)),
+    ("[NaN,1]", (float, int)),
+    ("[Infinity,1]", (float, int)),
+    ('["nan",1]', (float, int)),
+    (f"[{INT4_MAX + 1}]", (int,)),
+    ("[1,2]", (int,)),            # wrong shape
+    ('{"id":1}', (int,)),
+    ('["not a date",1]', (datetime, int)),
+])
+def test_malformed_cursor_is_a_400(text, types):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(raw_cursor(text), *types)
+    assert exc.value.status_code == 400
+
+
+def test_garbage_cursor_is_a_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("!!not-base64!!", int)
+    assert exc.value.status_code == 400
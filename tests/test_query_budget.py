@@ -0,0 +1,47 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from metrics import MetricsMiddleware, QueryBudgetExceeded, instrument_engine, query_budget
+
+
+@pytest.fixture
+def app():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    def run_queries(count):
+        with engine.connect() as conn:
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+
+    @app.get("/within", dependencies=[Depends(query_budget(2))])
+    async def within():
+        run_queries(2)
+        return {"ok": True}
+
+    @app.get("/n-plus-one", dependencies=[Depends(query_budget(1))])
+    async def n_plus_one():
+        run_queries(3)
+        return {"ok": True}
+
+    return app
+
+
+def test_route_within_budget_passes(app):
+    response = TestClient(app).get("/within")
+    assert response.status_code == 200
+    assert response.headers["x-db-queries"] == "2"
+
+
+def test_route_over_budget_raises(app):
+    with pytest.raises(QueryBudgetExceeded, match="issued 3 queries, budget is 1"):
+        TestClient(app).get("/n-plus-one")
+
+
+def test_route_over_budget_is_a_500(app):
+    response = TestClient(app, raise_server_exceptions=False).get("/n-plus-one")
+    assert response.status_code == 500
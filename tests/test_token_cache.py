@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+import cache
+import security
+from security import ALGORITHM, SECRET_KEY, create_access_token, verify_token
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    security._token_cache.clear()
+    security._rejected_tokens.clear()
+    yield
+    security._token_cache.clear()
+    security._rejected_tokens.clear()
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    decode = security.decode_token
+
+    def counting_decode(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(security, "decode_token", counting_decode)
+    return calls
+
+
+def test_valid_token_is_decoded_once(decode_calls):
+    token = create_access_token({"sub": "7"})
+    assert verify_token(token)["sub"] == 7
+    assert verify_token(token)["sub"] == 7
+    assert len(decode_calls) == 1
+    assert len(security._rejected_tokens) == 0
+
+
+def test_rejected_token_is_remembered_separately(decode_calls):
+    assert verify_token("not-a-jwt") is None
+    assert verify_token("not-a-jwt") is None
+    assert len(decode_calls) == 1
+    assert len(security._token_cache) == 0
+    assert len(security._rejected_tokens) == 1
+
+
+def test_non_int_sub_is_rejected():
+    token = jwt.encode({"sub": "alice"}, SECRET_KEY, algorithm=ALGORITHM)
+    assert verify_token(token) is None
+    assert len(security._token_cache) == 0
+
+
+def test_missing_sub_is_rejected():
+    assert verify_token(create_access_token({"scope": "x"})) is None
+
+
+def test_cache_entry_never_outlives_exp(decode_calls, monkeypatch):
+    token = create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=60))
+    payload = verify_token(token)
+    assert payload is not None
+
+    # jump the cache clock past exp: the entry must be gone, forcing a fresh decode
+    now = time.monotonic()
+    remaining = payload["exp"] - time.time()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + remaining + 1)
+    verify_token(token)
+    assert len(decode_calls) == 2
+
+
+def test_expired_token_is_rejected():
+    assert verify_token(create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-5))) is None
+    assert len(security._token_cache) == 0